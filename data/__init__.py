@@ -1,16 +1,45 @@
 import os
-import pandas as pd
-from sys import path
-from typing import List
+import pickle
+import sys
+from typing import Tuple
 
 data_path = os.path.join(os.path.dirname(__file__), "")
 
-COUNTRIES:List[str] = pd.read_csv(data_path + "countries.csv", header=None, names=["country"])\
-    ["country"]\
-    .to_list()
-assert "Albania" in COUNTRIES
+# Sanity value expected in each dataset, checked on first load.
+_DATASETS = {
+    "COUNTRIES": ("countries", "Albania"),
+    "DOMAINS": ("domains", "Energy"),
+}
 
-DOMAINS:List[str] = pd.read_csv(data_path + "domains.csv", header=None, names=["domain"])\
-    ["domain"]\
-    .to_list()
-assert "Energy" in DOMAINS
\ No newline at end of file
+
+def _load_cached(name: str) -> Tuple[str, ...]:
+    """Load a single-column CSV as a tuple, caching the parsed result in a
+    sibling .pkl that is refreshed whenever the CSV is newer."""
+    csv_path = os.path.join(data_path, name + ".csv")
+    pkl_path = csv_path + ".pkl"
+    csv_mtime = os.path.getmtime(csv_path)
+    if os.path.exists(pkl_path) and os.path.getmtime(pkl_path) >= csv_mtime:
+        with open(pkl_path, "rb") as f:
+            return tuple(sys.intern(v) for v in pickle.load(f))
+    with open(csv_path, "r", encoding="utf-8-sig") as f:
+        # Single-column, unquoted data: one read + splitlines is the
+        # cheapest parse; utf-8-sig strips a BOM if one sneaks in.
+        # Interned so downstream dict lookups keyed on these strings can
+        # compare by pointer.
+        values = tuple(sys.intern(line.strip()) for line in f.read().splitlines() if line.strip())
+    with open(pkl_path, "wb") as f:
+        pickle.dump(values, f)
+    return values
+
+
+def __getattr__(attr: str) -> Tuple[str, ...]:
+    # PEP 562: read a CSV only when its list is first accessed, so imports
+    # that never touch the data (e.g. schema dumps) do no file I/O.
+    try:
+        name, sentinel = _DATASETS[attr]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
+    values = _load_cached(name)
+    assert sentinel in values
+    globals()[attr] = values
+    return values
@@ -0,0 +1,24 @@
+"""Dump the JSON schemas of every response model in a single process.
+
+Usage:
+    python -m library
+"""
+import json
+
+from library import organization_question, organization_cyber_question
+
+# Registry of schema-bearing question modules, keyed by a short name.
+MODULES = {
+    "organization": organization_question,
+    "organization_cyber": organization_cyber_question,
+}
+
+
+def main() -> None:
+    for name, module in MODULES.items():
+        print(f"# {name}")
+        print(json.dumps(module.get_schema(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
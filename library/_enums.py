@@ -0,0 +1,7 @@
+from typing import Literal
+
+# Confidence in the assessment
+ConfidenceLevel = Literal["HIGH", "MEDIUM", "LOW", "NONE"]
+
+# Organization's level of cybersecurity responsibility
+ResponsibilityLevel = Literal["HIGH", "LOW", "NONE"]
@@ -0,0 +1,25 @@
+from string import Formatter
+
+
+def compile_template(template: str):
+    """Pre-parse a str.format-style template into literal/field segments.
+
+    str.format re-tokenizes the format string on every call; for a grid of
+    (word set) substitutions against one fixed template that parsing is pure
+    overhead. Returns a render(**kwargs) closure that just joins segments.
+    """
+    segments = list(Formatter().parse(template))
+
+    def render(**kwargs) -> str:
+        parts = []
+        for literal, field, spec, conversion in segments:
+            parts.append(literal)
+            if field is None:
+                continue
+            value = kwargs[field]
+            if conversion == "r":
+                value = repr(value)
+            parts.append(format(value, spec) if spec else str(value))
+        return "".join(parts)
+
+    return render
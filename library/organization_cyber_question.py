@@ -1,28 +1,17 @@
-from typing import List, Optional, Dict
-from enum import Enum
-from pydantic import BaseModel, Field
-from robora import QuestionSet
-from datetime import date
+import sys
+from functools import lru_cache
+from typing import Iterable, List, Optional, Dict, Tuple
+from pydantic import BaseModel, ConfigDict, Field
 
-
-class ResponsibilityLevel(Enum):
-    """Organization's level of cybersecurity responsibility"""
-    HIGH = "HIGH"
-    LOW = "LOW"
-    NONE = "NONE"
-
-
-class ConfidenceLevel(Enum):
-    """Confidence in the assessment"""
-    HIGH = "HIGH"
-    MEDIUM = "MEDIUM"
-    LOW = "LOW"
-    NONE = "NONE"
+from library._enums import ConfidenceLevel, ResponsibilityLevel
+from library._templating import compile_template
 
 
 class OrganizationCyberModel(BaseModel):
     """Assessment of how the organization is responsible for the country's cybersecurity governance, prevention, planning, response, or enforcement."""
 
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     organization: str = Field(
         description="Name of the given top-level state Organ (i.e., ministry/department/agency)."
     )
@@ -48,8 +37,10 @@ class OrganizationCyberModel(BaseModel):
     )
 
 
-if __name__ == "__main__":
-    print(OrganizationCyberModel.model_json_schema())
+@lru_cache(maxsize=None)
+def get_schema() -> Dict:
+    """JSON schema for OrganizationCyberModel, generated once and cached."""
+    return OrganizationCyberModel.model_json_schema()
 
 
 _template = """Is the {organization_country} responsible for cybersecurity?
@@ -57,14 +48,27 @@ _template = """Is the {organization_country} responsible for cybersecurity?
 A ministry handles cybersecurity if it: Is explicitly mentioned in a national strategy/law/report as being responsible for cybersecurity policy, implementation, or technical coordination; Hosts a national CERT/CSIRT/CIRT; Leads or is a member of a cybersecurity committee, council, or working group; Oversees information security standards, network protection, or the like; Attends or participates in events, workshops, or press releases; or works with other countries or organizations on joint initiatives.
 """
 
+# Pre-compiled renderer for callers formatting prompts outside robora.
+render_question = compile_template(_template)
+
+
+@lru_cache(maxsize=32)
+def _question_set(org_countries: tuple) -> "QuestionSet":
+    # Deferred import: keeps robora's import graph out of schema-only use.
+    from robora import QuestionSet
 
-def get_question_set(organizations: List[str], countries: List[str]) -> QuestionSet:
-    org_countries = [f"{org} in {country}" for (org, country) in zip(organizations, countries)]
     word_sets: Dict[str, List[str]] = {
-        "organization_country": org_countries
+        "organization_country": list(org_countries)
     }
     return QuestionSet(
         word_sets=word_sets,
         template=_template,
         response_model=OrganizationCyberModel,
     )
+
+
+def get_question_set(pairs: Iterable[Tuple[str, str]]) -> "QuestionSet":
+    """Build the question set from an iterable of (organization, country) pairs,
+    formatted into interned \"{org} in {country}\" phrases in a single pass."""
+    org_countries = tuple(sys.intern(f"{org} in {country}") for (org, country) in pairs)
+    return _question_set(org_countries)
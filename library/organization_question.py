@@ -1,17 +1,13 @@
-from typing import List, Optional, Dict
-from enum import Enum
-from pydantic import BaseModel, Field
-from robora import QuestionSet
-from datetime import date
-
-class ConfidenceLevel(Enum):
-    """Confidence in the assessment"""
-    HIGH = "HIGH"
-    MEDIUM = "MEDIUM"
-    LOW = "LOW"
-    NONE = "NONE"
+from functools import lru_cache
+from typing import List, Dict
+from pydantic import BaseModel, ConfigDict, Field
+
+from library._enums import ConfidenceLevel
+from library._templating import compile_template
 
 class OrganizationModel(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     organization_name: str = Field(
         description="Name of the top-level state Organ (i.e., ministry/department/agency). If no such Organ exists, return 'NONE'."
     )
@@ -19,24 +15,103 @@ class OrganizationModel(BaseModel):
         description="Confidence level of your assessment."
     )
 
-if __name__ == "__main__":
-    print(OrganizationModel.model_json_schema())
+class CountryOrganization(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    country: str = Field(
+        description="Country this entry answers for, exactly as listed in the question."
+    )
+    organization_name: str = Field(
+        description="Name of the top-level state Organ (i.e., ministry/department/agency). If no such Organ exists, return 'NONE'."
+    )
+    confidence: ConfidenceLevel = Field(
+        description="Confidence level of your assessment."
+    )
+
+
+class OrganizationBatchModel(BaseModel):
+    """Batched variant of OrganizationModel: one entry per requested country."""
+
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+    countries: List[CountryOrganization] = Field(
+        description="One entry per country, in the order the countries are listed."
+    )
+
+
+@lru_cache(maxsize=None)
+def get_schema() -> Dict:
+    """JSON schema for OrganizationModel, generated once and cached."""
+    return OrganizationModel.model_json_schema()
 
 
 _template = (
    "What is the top-level state Organ (i.e., ministry/department/agency) responsible for {domain} in {country}?"
 )
 
+# Pre-compiled renderer for callers formatting prompts outside robora.
+render_question = compile_template(_template)
+
+
+@lru_cache(maxsize=None)
+def _upper(words: tuple) -> List[str]:
+    return [word.upper() for word in words]
+
+
+@lru_cache(maxsize=32)
+def _question_set(domains: tuple, countries: tuple) -> "QuestionSet":
+    # Imported here so schema-only users of this module don't pay for
+    # robora's import graph.
+    from robora import QuestionSet
 
-def get_question_set(domains: List[str], countries: List[str]) -> QuestionSet:
-    domains = [domain.upper() for domain in domains]
-    countries = [country.upper() for country in countries]
     word_sets: Dict[str, List[str]] = {
-        "domain": domains,
-        "country": countries,
+        "domain": _upper(domains),
+        "country": _upper(countries),
     }
     return QuestionSet(
         word_sets=word_sets,
         template=_template,
         response_model=OrganizationModel,
     )
+
+
+def get_question_set(domains: List[str], countries: List[str]) -> "QuestionSet":
+    return _question_set(tuple(domains), tuple(countries))
+
+
+_batch_template = (
+   "For each of the following countries, what is the top-level state Organ (i.e., ministry/department/agency) responsible for {domain}?\n"
+   "\n"
+   "Countries:\n"
+   "{countries}"
+)
+
+
+@lru_cache(maxsize=32)
+def _batched_question_set(domains: tuple, countries: tuple, batch_size: int) -> "QuestionSet":
+    from robora import QuestionSet
+
+    countries = _upper(countries)
+    batches = [
+        "\n".join(f"{i}. {country}" for i, country in enumerate(countries[start:start + batch_size], 1))
+        for start in range(0, len(countries), batch_size)
+    ]
+    word_sets: Dict[str, List[str]] = {
+        "domain": _upper(domains),
+        "countries": batches,
+    }
+    return QuestionSet(
+        word_sets=word_sets,
+        template=_batch_template,
+        response_model=OrganizationBatchModel,
+    )
+
+
+def get_batched_question_set(domains: List[str], countries: List[str], batch_size: int = 5) -> "QuestionSet":
+    """Like get_question_set, but asks about batch_size countries per prompt.
+
+    One prompt covers a numbered list of countries and the response model
+    returns one CountryOrganization entry per country, cutting per-call
+    prompt-token and round-trip overhead by roughly the batch size.
+    """
+    return _batched_question_set(tuple(domains), tuple(countries), batch_size)
@@ -7,7 +7,7 @@ This script automates the two-step process:
 2. Assess cybersecurity responsibility for each organization
 
 Features:
-- Sequential processing of domains (one at a time) to avoid rate limits
+- Concurrent domain processing bounded by --domain-concurrency to avoid rate limits
 - Automatic retry with exponential backoff (2s, 4s, 8s, 16s) for transient failures
 - Progress tracking and error reporting
 
@@ -18,208 +18,519 @@ Usage:
 
 import argparse
 import asyncio
+import csv
+import hashlib
+import json
+import sqlite3
 import sys
 from pathlib import Path
 from typing import List
-import pandas as pd
+
+import openpyxl
+from aiolimiter import AsyncLimiter
+from tenacity import AsyncRetrying, stop_after_attempt, wait_random_exponential
+from tqdm.asyncio import tqdm
+
+try:
+    import xlsxwriter
+except ImportError:  # openpyxl write-only mode is the fallback
+    xlsxwriter = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # csv.DictWriter is the fallback
+    pa = None
 
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent.resolve()))
 
-from robora import Workflow, SQLiteStorageProvider
+from robora import QueryHandler, QueryResponse, Workflow, SQLiteStorageProvider
 from robora.sonar_query import SonarQueryHandler
-from library.organization_question import OrganizationModel, get_question_set as get_org_questions
+from library.organization_question import (
+    OrganizationModel,
+    OrganizationBatchModel,
+    get_question_set as get_org_questions,
+    get_batched_question_set as get_batched_org_questions,
+)
 from library.organization_cyber_question import OrganizationCyberModel, get_question_set as get_cyber_questions
 from data import COUNTRIES, DOMAINS
 
+# O(1) membership for domain validation, plus a lowercase map to catch
+# capitalization-only mismatches before they cost API spend.
+DOMAINS_SET = frozenset(DOMAINS)
+_DOMAINS_BY_LOWER = {d.lower(): d for d in DOMAINS}
 
-class MinistryWorkflow:
+
+# Cross-run response cache shared by every domain, step, and invocation.
+CACHE_DIR = Path.home() / ".cache" / "nadiya"
+
+# Token bucket shared by every workflow: per-workflow worker counts don't
+# bound the combined request rate once domains run concurrently, so all
+# API calls funnel through this limiter. Rebuilt from the rps argument by
+# run_batch_workflow, so programmatic callers get it too, not just the CLI.
+GLOBAL_LIMITER = AsyncLimiter(max_rate=5, time_period=1.0)
+
+# True global concurrency cap. robora's Workflow builds a fresh semaphore per
+# ask_multiple_stream call, so its workers= only bounds one question set at a
+# time; this semaphore bounds in-flight API calls across every domain and
+# step. Rebuilt from the workers argument by run_batch_workflow.
+GLOBAL_WORKER_SEM = asyncio.Semaphore(4)
+
+
+class CachedQueryHandler(QueryHandler):
+    """Persistent content-addressable cache around another query handler.
+
+    Responses are keyed by (LLM model, response model, prompt) and stored in
+    ~/.cache/nadiya/sonar.sqlite, so re-running a domain that was already
+    queried — even in a different output directory or on a different day —
+    costs zero API calls. Errors are never cached.
     """
-    Handles the complete workflow for a single ministry domain.
 
-    Includes automatic retry logic with exponential backoff (2s, 4s, 8s, 16s)
-    for handling rate limits and transient failures.
+    def __init__(self, inner: QueryHandler):
+        self.inner = inner
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # check_same_thread=False: the connection is created here on the main
+        # thread but used from asyncio.to_thread workers; Python's sqlite3
+        # serializes access to a shared connection.
+        self._db = sqlite3.connect(str(CACHE_DIR / "sonar.sqlite"), check_same_thread=False)
+        # The org and cyber handlers each hold a connection to this one file
+        # and write from worker threads concurrently; in rollback-journal
+        # mode that raises "database is locked" under load. WAL lets the
+        # writers interleave and busy_timeout makes the rest wait their turn.
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA busy_timeout=10000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, full_response TEXT)"
+        )
+        self._db.commit()
+
+    def _key(self, prompt: str) -> str:
+        payload = json.dumps({
+            "model": getattr(self.inner, "model", None),
+            "response_model": getattr(self.inner, "response_model", type(None)).__name__,
+            "prompt": prompt,
+        }, sort_keys=True)
+        return hashlib.blake2b(payload.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str):
+        row = self._db.execute(
+            "SELECT full_response FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _cache_put(self, key: str, full_response: dict) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, full_response) VALUES (?, ?)",
+            (key, json.dumps(full_response)),
+        )
+        self._db.commit()
+
+    async def query(self, prompt: str) -> QueryResponse:
+        key = self._key(prompt)
+        # SQLite work (including the commit's fsync) runs in a worker thread
+        # so it never stalls the event loop.
+        cached = await asyncio.to_thread(self._cache_get, key)
+        if cached is not None:
+            return QueryResponse(full_response=cached)
+
+        # Cache hits consume neither a worker slot nor rate-limit tokens.
+        async with GLOBAL_WORKER_SEM:
+            async with GLOBAL_LIMITER:
+                response = await self.inner.query(prompt)
+        if response.error is None and response.full_response is not None:
+            await asyncio.to_thread(self._cache_put, key, response.full_response)
+        return response
+
+    def extract_fields(self, full_response: dict) -> dict:
+        return self.inner.extract_fields(full_response)
+
+
+class WalSQLiteStorageProvider(SQLiteStorageProvider):
+    """SQLiteStorageProvider with WAL journaling enabled on the DB file.
+
+    journal_mode=WAL is a persistent property of the database file, so
+    setting it once at init covers every connection the provider opens
+    afterwards: readers stop blocking on writers and commits avoid the
+    rollback journal's double write of every page.
     """
 
-    def __init__(self, domain: str, output_dir: Path, workers: int = 4):
-        self.domain = domain.strip().title()
-        self.output_dir = output_dir / domain.lower().replace(" ", "_").replace("/", "_")
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.workers = workers
+    def _init_database(self) -> None:
+        super()._init_database()
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
 
-    async def step1_collect_organizations(self) -> pd.DataFrame:
-        """
-        Step 1: Collect organization names for this domain across all countries.
 
-        Includes automatic retry with exponential backoff (up to 4 retries).
-        """
-        print(f"\n{'='*60}")
-        print(f"STEP 1: Collecting organizations for {self.domain}")
-        print(f"{'='*60}")
-
-        # Setup storage and workflow
-        db_path = self.output_dir / "organization.db"
-        storage = SQLiteStorageProvider(str(db_path))
-        workflow = Workflow(
-            SonarQueryHandler(OrganizationModel),
-            storage,
-            workers=self.workers,
-        )
+class StreamingCsvWriter:
+    """Chunk-at-a-time CSV writer.
 
-        # Create question set
-        question_set = get_org_questions(
-            domains=[self.domain],
-            countries=COUNTRIES,
-        )
-        question_set.max_questions = 0  # No limit
+    Prefers pyarrow's vectorized CSV writer, which avoids per-cell Python
+    object handling for string-heavy tables; falls back to csv.DictWriter.
+    The header (and, for pyarrow, the schema) comes from the first chunk.
+    """
 
-        # Ask questions with retry logic, capturing only NEW answers from this run
-        max_retries = 4
-        base_delay = 2.0
-        answers = []
-        for attempt in range(max_retries + 1):
-            try:
-                # return_results=True gives us only the NEW answers from this run
-                answers = await workflow.ask_multiple(question_set, return_results=True)
-                break  # Success, exit retry loop
-            except Exception as e:
-                if attempt == max_retries:
-                    print(f"❌ Step 1 failed after {max_retries} retries: {e}")
-                    raise
-                delay = base_delay * (2 ** attempt)
-                print(f"⚠️  Step 1 failed (attempt {attempt + 1}/{max_retries + 1}): {e}")
-                print(f"   Retrying in {delay}s...")
-                await asyncio.sleep(delay)
-
-        if not answers:
-            raise ValueError(f"No answers returned for {self.domain}. Check if questions were processed.")
+    def __init__(self, path: Path):
+        self.path = path
+        self._writer = None
+        self._file = None
+        self._schema = None
+
+    def write_records(self, records: List[dict]) -> None:
+        if pa is not None:
+            table = pa.Table.from_pylist(records, schema=self._schema)
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = pa_csv.CSVWriter(str(self.path), self._schema)
+            self._writer.write_table(table)
+        else:
+            if self._writer is None:
+                self._file = open(self.path, "w", newline="", encoding="utf-8")
+                self._writer = csv.DictWriter(self._file, fieldnames=list(records[0].keys()),
+                                              extrasaction="ignore")
+                self._writer.writeheader()
+            self._writer.writerows(records)
 
-        flattened = pd.concat([ans.flattened for ans in answers]).reset_index(drop=True)
-        flattened.drop(columns=["enriched_citations"], inplace=True, errors='ignore')
+    def close(self) -> None:
+        if pa is not None and self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
 
-        # Save to CSV (mode='w' by default, overwrites existing file)
-        csv_path = self.output_dir / f"organization_names_{self.domain.lower().replace(' ', '_')}.csv"
-        flattened.to_csv(csv_path, index=False, mode='w')
-        print(f"✓ Saved {len(flattened)} organizations to {csv_path}")
 
-        return flattened
+class StreamingXlsxWriter:
+    """Row-at-a-time XLSX writer.
 
-    async def step2_assess_cybersecurity(self, organizations_df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Step 2: Assess cybersecurity responsibility for each organization.
+    Prefers xlsxwriter's constant_memory mode, which flushes each row to disk
+    as it is written; falls back to openpyxl's write-only workbook.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        if xlsxwriter is not None:
+            self._workbook = xlsxwriter.Workbook(str(path), {"constant_memory": True})
+            self._sheet = self._workbook.add_worksheet()
+            self._row = 0
+        else:
+            self._workbook = openpyxl.Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet()
+            self._row = None
+
+    def append(self, values: list) -> None:
+        if self._row is None:
+            self._sheet.append(values)
+        else:
+            self._sheet.write_row(self._row, 0, values)
+            self._row += 1
+
+    def close(self) -> None:
+        if self._row is None:
+            self._workbook.save(self.path)
+        else:
+            self._workbook.close()
+
+
+class MinistryWorkflow:
+    """
+    Handles the complete workflow for a single ministry domain.
+
+    Step 1 (organization collection) and Step 2 (cybersecurity assessment)
+    run as a fused producer/consumer pipeline: countries are queried in
+    chunks, and each chunk's organizations are assessed while the next
+    chunk is still being collected, so neither phase waits for the other
+    to finish end-to-end.
+
+    Includes automatic retry logic with exponential backoff (2s, 4s, 8s, 16s)
+    for handling rate limits and transient failures.
+    """
 
-        Includes automatic retry with exponential backoff (up to 4 retries).
+    # Countries per Step 1 batch; also the unit of work handed to Step 2.
+    COUNTRY_CHUNK_SIZE = 25
+
+    def __init__(self, domain: str, output_dir: Path, org_workflow: Workflow,
+                 cyber_workflow: Workflow, country_batch_size: int = 0):
+        self.domain = domain.strip().title()
+        self.domain_slug = self.domain.lower().replace(" ", "_").replace("/", "_")
+        self.output_dir = output_dir / self.domain_slug
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.country_batch_size = country_batch_size
+        # Normalized (org, country) pairs already sent to Step 2, so duplicate
+        # organizations from Step 1 don't cost duplicate API calls.
+        self._assessed_pairs: set = set()
+
+        # Shared across all domains (see run_batch_workflow); the global
+        # request bound lives in CachedQueryHandler, not in these objects.
+        self.org_workflow = org_workflow
+        self.cyber_workflow = cyber_workflow
+
+    async def _ask_with_retry(self, workflow: Workflow, question_set, step_label: str) -> list:
+        """Ask a question set with jittered exponential backoff (up to 4
+        retries), returning only the NEW answers from this run.
+
+        Random jitter (vs. the old fixed 2/4/8/16s ladder) spreads retries
+        from concurrent domains apart instead of re-hitting the API in
+        lockstep after a rate-limit window expires.
         """
-        print(f"\n{'='*60}")
-        print(f"STEP 2: Assessing cybersecurity responsibility for {self.domain}")
-        print(f"{'='*60}")
-
-        # Setup storage and workflow
-        db_path = self.output_dir / "organization_cyber.db"
-        storage = SQLiteStorageProvider(str(db_path))
-        workflow = Workflow(
-            SonarQueryHandler(OrganizationCyberModel),
-            storage,
-            workers=self.workers,
-        )
+        def log_retry(retry_state):
+            print(f"⚠️  {step_label} failed (attempt {retry_state.attempt_number}/5): "
+                  f"{retry_state.outcome.exception()}")
+            print(f"   Retrying in {retry_state.next_action.sleep:.1f}s...")
 
-        # Extract organizations and countries from step 1
-        organizations = organizations_df["organization_name"].tolist()
-        countries = organizations_df["country"].tolist()
+        try:
+            async for attempt in AsyncRetrying(
+                wait=wait_random_exponential(multiplier=2, max=16),
+                stop=stop_after_attempt(5),
+                before_sleep=log_retry,
+                reraise=True,
+            ):
+                with attempt:
+                    answers = []
+                    # Stream answers into a progress bar; single-line amortized
+                    # updates instead of one blocking print per answer.
+                    with tqdm(total=len(list(question_set.get_questions())),
+                              desc=step_label, unit="q", leave=False) as progress:
+                        async for answer in workflow.ask_multiple_stream(question_set):
+                            answers.append(answer)
+                            progress.update(1)
+                    return answers
+        except Exception as e:
+            print(f"❌ {step_label} failed after 4 retries: {e}")
+            raise
+
+    async def collect_organizations_chunk(self, workflow: Workflow, countries: List[str]) -> List[dict]:
+        """Step 1 for one chunk of countries: collect organization names as records."""
+        if self.country_batch_size:
+            question_set = get_batched_org_questions(
+                domains=[self.domain],
+                countries=list(countries),
+                batch_size=self.country_batch_size,
+            )
+        else:
+            question_set = get_org_questions(
+                domains=[self.domain],
+                countries=list(countries),
+            )
+        question_set.max_questions = 0  # No limit
+
+        answers = await self._ask_with_retry(workflow, question_set, f"Step 1 ({self.domain})")
+        records: List[dict] = []
+        for ans in answers or []:
+            for record in ans.flattened.to_dict('records'):
+                record.pop("enriched_citations", None)
+                # Batched answers carry one entry per country; explode them
+                # into the same per-(org, country) shape as unbatched ones.
+                entries = record.pop("countries", None)
+                if isinstance(entries, list):
+                    for entry in entries:
+                        records.append({**record, **entry})
+                else:
+                    records.append(record)
+        return records
+
+    async def assess_cybersecurity_chunk(self, workflow: Workflow, org_records: List[dict]) -> List[dict]:
+        """Step 2 for one chunk of organizations: assess cybersecurity responsibility.
+
+        Deduplicates on a case/whitespace-insensitive (org, country) key —
+        Step 1 often lists the same ministry under slightly different forms.
+        """
+        unique_records = []
+        for record in org_records:
+            key = (str(record["organization_name"]).strip().lower(),
+                   str(record["country"]).strip().lower())
+            if key in self._assessed_pairs:
+                continue
+            self._assessed_pairs.add(key)
+            unique_records.append(record)
+        if not unique_records:
+            return []
 
-        # Create question set
         question_set = get_cyber_questions(
-            organizations=organizations,
-            countries=countries,
+            (record["organization_name"], record["country"]) for record in unique_records
         )
         question_set.max_questions = 0  # No limit
 
-        # Ask questions with retry logic, capturing only NEW answers from this run
-        max_retries = 4
-        base_delay = 2.0
-        answers = []
-        for attempt in range(max_retries + 1):
-            try:
-                # return_results=True gives us only the NEW answers from this run
-                answers = await workflow.ask_multiple(question_set, return_results=True)
-                break  # Success, exit retry loop
-            except Exception as e:
-                if attempt == max_retries:
-                    print(f"❌ Step 2 failed after {max_retries} retries: {e}")
-                    raise
-                delay = base_delay * (2 ** attempt)
-                print(f"⚠️  Step 2 failed (attempt {attempt + 1}/{max_retries + 1}): {e}")
-                print(f"   Retrying in {delay}s...")
-                await asyncio.sleep(delay)
-
-        if not answers:
-            raise ValueError(f"No answers returned for {self.domain} cybersecurity assessment. Check if questions were processed.")
+        answers = await self._ask_with_retry(workflow, question_set, f"Step 2 ({self.domain})")
+        records: List[dict] = []
+        for ans in answers or []:
+            for record in ans.flattened.to_dict('records'):
+                # List-of-dicts cell that neither XLSX writer accepts;
+                # pretty_citations carries the readable form.
+                record.pop("enriched_citations", None)
+                records.append(record)
+        return records
 
-        flattened = pd.concat([ans.flattened for ans in answers]).reset_index(drop=True)
+    async def run_complete_workflow(self):
+        """Run the fused Step 1 → Step 2 pipeline for this domain.
 
-        # Save to Excel (overwrites existing file)
-        xlsx_path = self.output_dir / f"organization_cyber_{self.domain.lower().replace(' ', '_')}.xlsx"
-        flattened.to_excel(xlsx_path, index=False, engine='openpyxl')
-        print(f"✓ Saved {len(flattened)} assessments to {xlsx_path}")
+        Outputs are streamed: each chunk of organizations is appended to the
+        CSV as it arrives and each assessment row goes straight into a
+        write-only XLSX workbook, so peak memory stays O(chunk) instead of
+        O(total answers). Returns (organization_count, assessment_count).
+        """
+        print(f"\n🚀 Starting fused workflow for domain: {self.domain}")
 
-        return flattened
+        csv_path = self.output_dir / f"organization_names_{self.domain_slug}.csv"
+        xlsx_path = self.output_dir / f"organization_cyber_{self.domain_slug}.xlsx"
 
-    async def run_complete_workflow(self):
-        """Run both steps of the workflow."""
-        print(f"\n🚀 Starting complete workflow for domain: {self.domain}")
+        # Bounded queue so collection never runs unboundedly ahead of assessment.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+        org_count = 0
+        cyber_count = 0
 
-        # Step 1: Collect organizations
-        organizations_df = await self.step1_collect_organizations()
+        async def produce():
+            # File writes run in a worker thread so concurrent domains'
+            # network coroutines keep making progress during disk I/O.
+            nonlocal org_count
+            csv_writer = StreamingCsvWriter(csv_path)
+            try:
+                for start in range(0, len(COUNTRIES), self.COUNTRY_CHUNK_SIZE):
+                    chunk = COUNTRIES[start:start + self.COUNTRY_CHUNK_SIZE]
+                    chunk_records = await self.collect_organizations_chunk(self.org_workflow, chunk)
+                    if not chunk_records:
+                        continue
+                    await asyncio.to_thread(csv_writer.write_records, chunk_records)
+                    org_count += len(chunk_records)
+                    await queue.put(chunk_records)
+            finally:
+                # Always deliver the sentinel, even when Step 1 exhausts its
+                # retries — otherwise the consumer blocks on queue.get forever.
+                # Delivery must not block either: if the consumer is already
+                # cancelled, nothing will ever make room in a full queue, so
+                # drop stale chunks until the sentinel fits.
+                try:
+                    await asyncio.to_thread(csv_writer.close)
+                finally:
+                    while True:
+                        try:
+                            queue.put_nowait(None)  # Sentinel: no more chunks
+                            break
+                        except asyncio.QueueFull:
+                            queue.get_nowait()
+
+        async def consume():
+            nonlocal cyber_count
+            xlsx_writer = StreamingXlsxWriter(xlsx_path)
+            header = None
+
+            def write_assessments(records: List[dict]):
+                nonlocal header, cyber_count
+                for record in records:
+                    if header is None:
+                        header = list(record.keys())
+                        xlsx_writer.append(header)
+                    xlsx_writer.append([record.get(column) for column in header])
+                    cyber_count += 1
 
-        # Step 2: Assess cybersecurity
-        cyber_df = await self.step2_assess_cybersecurity(organizations_df)
+            try:
+                while True:
+                    chunk_records = await queue.get()
+                    if chunk_records is None:
+                        break
+                    assessments = await self.assess_cybersecurity_chunk(self.cyber_workflow, chunk_records)
+                    if assessments:
+                        await asyncio.to_thread(write_assessments, assessments)
+            finally:
+                await asyncio.to_thread(xlsx_writer.close)
+
+        # TaskGroup ties the two lifetimes together: if either side fails,
+        # the other is cancelled instead of orphaned — a dead Step 2 must not
+        # leave Step 1 spending API calls with no consumer (or vice versa).
+        async with asyncio.TaskGroup() as task_group:
+            task_group.create_task(produce())
+            task_group.create_task(consume())
+
+        if org_count == 0:
+            raise ValueError(f"No answers returned for {self.domain}. Check if questions were processed.")
+        print(f"✓ Saved {org_count} organizations to {csv_path}")
+
+        if cyber_count == 0:
+            raise ValueError(f"No answers returned for {self.domain} cybersecurity assessment. Check if questions were processed.")
+        print(f"✓ Saved {cyber_count} assessments to {xlsx_path}")
 
         print(f"\n✅ Completed workflow for {self.domain}")
-        print(f"   Organizations collected: {len(organizations_df)}")
-        print(f"   Cybersecurity assessments: {len(cyber_df)}")
+        print(f"   Organizations collected: {org_count}")
+        print(f"   Cybersecurity assessments: {cyber_count}")
 
-        return organizations_df, cyber_df
+        return org_count, cyber_count
 
 
-async def run_batch_workflow(domains: List[str], output_dir: Path, workers: int = 4):
+async def run_batch_workflow(domains: List[str], output_dir: Path, workers: int = 4,
+                             domain_concurrency: int = 2, country_batch_size: int = 0,
+                             rps: float = 5.0):
     """
-    Run the workflow for multiple domains SEQUENTIALLY (one at a time).
+    Run the workflow for multiple domains CONCURRENTLY, bounded by a semaphore.
 
-    IMPORTANT: Domains are processed one at a time to avoid rate limits.
-    Within each domain, questions are processed in parallel using 'workers' threads.
+    IMPORTANT: 'domain_concurrency' caps how many domains are in flight at
+    once, and every real API call acquires both the global rate limiter and
+    the global worker semaphore, so 'workers' bounds in-flight requests and
+    'rps' bounds requests per second across all domains and steps combined.
 
     Args:
         domains: List of domain names to process
         output_dir: Directory for outputs
-        workers: Number of parallel workers PER DOMAIN (default: 4)
+        workers: Max in-flight API requests across all domains (default: 4)
+        domain_concurrency: Max domains processed at the same time (default: 2)
+        country_batch_size: Countries per Step 1 prompt (0 = one per prompt)
+        rps: Max API requests per second across all domains (default: 5)
     """
+    # Rebuild the global limiter and semaphore here, not just in main(), so
+    # programmatic callers (notebook, other scripts) actually get the
+    # workers/rps they asked for instead of the import-time defaults.
+    global GLOBAL_LIMITER, GLOBAL_WORKER_SEM
+    GLOBAL_LIMITER = AsyncLimiter(max_rate=rps, time_period=1.0)
+    GLOBAL_WORKER_SEM = asyncio.Semaphore(workers)
+
     print(f"\n{'#'*60}")
     print(f"# BATCH MINISTRY WORKFLOW")
-    print(f"# Processing {len(domains)} domains SEQUENTIALLY")
-    print(f"# Workers per domain: {workers}")
+    print(f"# Processing {len(domains)} domains (up to {domain_concurrency} concurrently)")
+    print(f"# Shared workers: {workers} ({rps:g} requests/s)")
     print(f"# Output directory: {output_dir}")
     print(f"{'#'*60}")
-    print(f"\nNote: Domains processed one at a time to avoid rate limits.")
 
-    results = {}
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # One workflow (handler + storage) per model class, shared by every
+    # domain. Note robora's workers= only caps concurrency within a single
+    # ask_multiple_stream call; the cross-domain bound is GLOBAL_WORKER_SEM
+    # inside CachedQueryHandler.
+    org_model = OrganizationBatchModel if country_batch_size else OrganizationModel
+    org_workflow = Workflow(
+        CachedQueryHandler(SonarQueryHandler(org_model)),
+        WalSQLiteStorageProvider(str(output_dir / "organization.db")),
+        workers=workers,
+    )
+    cyber_workflow = Workflow(
+        CachedQueryHandler(SonarQueryHandler(OrganizationCyberModel)),
+        WalSQLiteStorageProvider(str(output_dir / "organization_cyber.db")),
+        workers=workers,
+    )
 
-    # Process domains SEQUENTIALLY (one at a time) to avoid rate limits
-    for i, domain in enumerate(domains, 1):
-        print(f"\n[{i}/{len(domains)}] Processing domain: {domain}")
+    semaphore = asyncio.Semaphore(domain_concurrency)
 
-        workflow = MinistryWorkflow(domain, output_dir, workers=workers)
-        try:
-            org_df, cyber_df = await workflow.run_complete_workflow()
+    async def process_domain(domain: str):
+        async with semaphore:
+            workflow = MinistryWorkflow(domain, output_dir, org_workflow, cyber_workflow,
+                                        country_batch_size=country_batch_size)
+            return await workflow.run_complete_workflow()
+
+    outcomes = await asyncio.gather(
+        *(process_domain(domain) for domain in domains),
+        return_exceptions=True,
+    )
+
+    results = {}
+    for domain, outcome in zip(domains, outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"❌ Error processing {domain}: {outcome}")
             results[domain] = {
-                'status': 'success',
-                'organizations': len(org_df),
-                'assessments': len(cyber_df),
+                'status': 'error',
+                'error': str(outcome),
             }
-        except Exception as e:
-            print(f"❌ Error processing {domain}: {e}")
+        else:
+            org_count, cyber_count = outcome
             results[domain] = {
-                'status': 'error',
-                'error': str(e),
+                'status': 'success',
+                'organizations': org_count,
+                'assessments': cyber_count,
             }
 
     # Print summary
@@ -236,6 +547,12 @@ async def run_batch_workflow(domains: List[str], output_dir: Path, workers: int
 
 
 def main():
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass  # Fall back to the default asyncio event loop
+
     parser = argparse.ArgumentParser(
         description="Batch workflow for collecting ministry organizations and cybersecurity assessments"
     )
@@ -259,7 +576,25 @@ def main():
         "--workers",
         type=int,
         default=4,
-        help="Number of parallel workers (default: 4)"
+        help="Max in-flight API requests across all domains (default: 4)"
+    )
+    parser.add_argument(
+        "--domain-concurrency",
+        type=int,
+        default=2,
+        help="Max domains processed concurrently (default: 2)"
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        default=5.0,
+        help="Global API requests per second across all domains (default: 5)"
+    )
+    parser.add_argument(
+        "--country-batch-size",
+        type=int,
+        default=0,
+        help="Ask about N countries per Step 1 prompt (default: 0 = one per prompt)"
     )
 
     args = parser.parse_args()
@@ -268,20 +603,27 @@ def main():
     if args.all_domains:
         domains_to_process = DOMAINS
     elif args.domains:
-        domains_to_process = [d.strip() for d in args.domains.split(",")]
+        domains_to_process = tuple(d.strip() for d in args.domains.split(","))
     else:
         parser.error("Must specify either --domains or --all-domains")
 
     # Validate domains
-    invalid_domains = [d for d in domains_to_process if d not in DOMAINS]
+    invalid_domains = [d for d in domains_to_process if d not in DOMAINS_SET]
     if invalid_domains:
+        for d in invalid_domains:
+            canonical = _DOMAINS_BY_LOWER.get(d.lower())
+            if canonical is not None:
+                print(f"Note: '{d}' differs from known domain '{canonical}' only in capitalization")
         print(f"Warning: Unknown domains will be processed anyway: {invalid_domains}")
         print(f"Available domains: {', '.join(DOMAINS)}")
 
     output_dir = Path(args.output_dir)
 
     # Run the batch workflow
-    asyncio.run(run_batch_workflow(domains_to_process, output_dir, args.workers))
+    asyncio.run(run_batch_workflow(domains_to_process, output_dir, args.workers,
+                                   domain_concurrency=args.domain_concurrency,
+                                   country_batch_size=args.country_batch_size,
+                                   rps=args.rps))
 
 
 if __name__ == "__main__":